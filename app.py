@@ -1,85 +1,260 @@
 import streamlit as st
-from test_deepseek import analyze_music, scout_talent, client
+from test_deepseek import analyze_music, scout_talent, get_async_openai_client
 from spotify_helper import SpotifyAnalyzer
 from datetime import datetime
+import pandas as pd
+from cachetools import TTLCache
+import httpx
+import asyncio
+import functools
+import hashlib
+import io
+import logging
+import queue
+import threading
 import os
 
-def display_ar_report(artist_data):
-    """Display AI-generated A&R report"""
+AR_SYSTEM_PROMPT = "You are an experienced A&R specialist with deep knowledge of the music industry, artist development, and market trends."
+TASTE_SYSTEM_PROMPT = "You are an expert music analyst specializing in user behavior and music trends."
+COMPLETION_CACHE_TTL = 3600  # seconds
+COMPLETION_CACHE_SIZE = 256  # finished responses kept in memory
+STREAM_TIMEOUT = 30  # seconds without a token before giving up
+REPORT_HEADER = "A&R Report for {name}\nLast.fm Insights:\n"
+
+# Named rather than __name__, which is "__main__" under `streamlit run`, so it can be filtered
+usage_logger = logging.getLogger("trmpy.deepseek_usage")
+
+@st.cache_resource
+def get_spotify():
+    """Shared SpotifyAnalyzer reused across reruns and sessions"""
+    return SpotifyAnalyzer()
+
+@st.cache_data(ttl=600, show_spinner=False)
+def cached_artist_data(artist_id):
+    """Artist profile, top tracks, related artists, albums and Last.fm data, cached per artist ID"""
+    artist_data = get_spotify().get_artist_data(artist_id, include_lastfm=True, include_albums=True)
+    if artist_data is None:
+        # Raising keeps failures out of the cache, so the next click retries Spotify
+        raise LookupError(f"No artist data for {artist_id}")
+    return artist_data
+
+@st.cache_resource
+def get_event_loop():
+    """Background event loop shared by all sessions for concurrent API calls"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+def run_async(coro):
+    """Schedule a coroutine on the background event loop and return its future"""
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop())
+
+@st.cache_resource
+def get_completion_cache():
+    """Finished DeepSeek responses keyed by prompt hash, plus the lock guarding them across sessions"""
+    return TTLCache(maxsize=COMPLETION_CACHE_SIZE, ttl=COMPLETION_CACHE_TTL), threading.Lock()
+
+def prompt_hash(system_prompt, prompt):
+    """Hash a whitespace-normalized prompt so trivially different reruns share a cache entry"""
+    normalized = " ".join(f"{system_prompt}\n{prompt}".split())
+    return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+
+async def _stream_completion(system_prompt, prompt, tokens):
+    """Stream a DeepSeek chat completion into a queue, ending with None"""
     try:
-        spotify = SpotifyAnalyzer()
-        lastfm_data = spotify.get_lastfm_data(artist_data['profile']['name'])
-        
-        # Display Last.fm insights in sidebar
-        with st.sidebar:
-            st.subheader("🎵 Last.fm Insights")
-            
-            if lastfm_data:
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.write("**Similar Artists**")
-                    for artist in lastfm_data.get('similar', [])[:3]:
-                        st.caption(f"- {artist}")
-                
-                with col2:
-                    st.write("**Top Tags**")
-                    for tag in lastfm_data.get('tags', [])[:3]:
-                        st.caption(f"#{tag.lower()}")
-                
-                if lastfm_data.get('bio'):
-                    st.divider()
-                    st.write("**Bio Summary**")
-                    st.caption(lastfm_data['bio'][:250] + "...")
-            else:
-                st.warning("No Last.fm data available")
+        stream = await get_async_openai_client().chat.completions.create(
+            model="deepseek-chat",
+            messages=[
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=1000,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        async for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                tokens.put(delta)
+            if chunk.usage:
+                usage_logger.info("DeepSeek usage: %d prompt + %d completion tokens",
+                                  chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+    finally:
+        tokens.put(None)
+
+class ChatJob:
+    """DeepSeek completion started in the background and drained into the UI as tokens arrive
+
+    Identical prompts answered within COMPLETION_CACHE_TTL are replayed from memory. Received
+    tokens are kept so a render interrupted by a rerun can resume where it left off.
+    """
+
+    def __init__(self, system_prompt, prompt):
+        self.key = prompt_hash(system_prompt, prompt)
+        self.parts = []
+        self.done = False
+
+        cache, lock = get_completion_cache()
+        with lock:
+            cached = cache.get(self.key)
+        if cached is not None:
+            self.parts.append(cached)
+            self.done = True
+            return
+
+        self._tokens = queue.Queue()
+        self._future = run_async(_stream_completion(system_prompt, prompt, self._tokens))
+
+    def stream(self):
+        """Yield the text received so far, then each new token until the completion ends"""
+        if self.parts:
+            yield "".join(self.parts)
+        if self.done:
+            return
+
+        try:
+            while (token := self._tokens.get(timeout=STREAM_TIMEOUT)) is not None:
+                self.parts.append(token)
+                yield token
+        except queue.Empty:
+            raise TimeoutError(f"DeepSeek sent nothing for {STREAM_TIMEOUT} seconds")
+        self._future.result()  # re-raise API errors once the stream ends
+        self.done = True
+
+        cache, lock = get_completion_cache()
+        with lock:
+            cache[self.key] = "".join(self.parts)
+
+@st.cache_resource
+def get_http_client():
+    """Async HTTP client for image downloads on the background event loop"""
+    return httpx.AsyncClient(http2=True, timeout=10)
+
+async def _download_images(client, urls):
+    """Download images concurrently, skipping any that fail"""
+    responses = await asyncio.gather(*(client.get(url) for url in urls), return_exceptions=True)
+    return {
+        url: response.content
+        for url, response in zip(urls, responses)
+        if isinstance(response, httpx.Response) and response.status_code == 200
+    }
 
-        # Generate and display report (existing code)
-        prompt = spotify.generate_ar_report(artist_data)
+@st.cache_data(ttl=86400, show_spinner=False)
+def fetch_images(urls):
+    """Image bytes keyed by URL, fetched in one concurrent batch and cached for a day"""
+    return run_async(_download_images(get_http_client(), urls)).result()
+
+@functools.lru_cache(maxsize=256)
+def artist_slug(name):
+    """Filename-friendly form of an artist name"""
+    return name.lower().replace(' ', '_')
+
+def summarize_lastfm(lastfm_data):
+    """Slice Last.fm data once into the pieces the sidebar, summary tiles and download use"""
+    if not lastfm_data:
+        return None
+
+    similar = lastfm_data.get('similar', [])
+    tags = lastfm_data.get('tags', [])
+    bio = lastfm_data.get('bio', '')
+    return {
+        'similar': ", ".join(similar),
+        'tags': ", ".join(tags),
+        'similar_count': len(similar),
+        'top_similar': similar[:3],
+        'top_tags': tags[:3],
+        'top_tags_label': ", ".join(tags[:3]),
+        'bio_snippet': bio[:250] + "..." if len(bio) > 250 else bio,
+        'bio_excerpt': bio[:500],
+        'bio_length': len(bio)
+    }
+
+def format_report_download(artist_data, lastfm_summary, report):
+    """Build the downloadable A&R report with Last.fm insights"""
+    lastfm_summary = lastfm_summary or {}
+    buf = io.StringIO()
+    buf.write(REPORT_HEADER.format(name=artist_data['profile']['name']))
+    buf.write(f"- Similar Artists: {lastfm_summary.get('similar') or 'N/A'}\n")
+    buf.write(f"- Top Tags: {lastfm_summary.get('tags') or 'N/A'}\n")
+    buf.write(f"- Bio Summary: {lastfm_summary.get('bio_excerpt') or 'N/A'}\n\n")
+    buf.write(report)
+    return buf.getvalue().encode('utf-8')
+
+def display_lastfm_insights(lastfm_summary):
+    """Display Last.fm insights in the sidebar"""
+    with st.sidebar:
+        st.subheader("🎵 Last.fm Insights")
         
-        if prompt:
-            response = client.chat.completions.create(
-                model="deepseek-chat",
-                messages=[
-                    {"role": "system", "content": "You are an experienced A&R specialist with deep knowledge of the music industry, artist development, and market trends."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.7,
-                max_tokens=1000
-            )
+        if lastfm_summary:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("**Similar Artists**")
+                for artist in lastfm_summary['top_similar']:
+                    st.caption(f"- {artist}")
             
-            report = response.choices[0].message.content
+            with col2:
+                st.write("**Top Tags**")
+                for tag in lastfm_summary['top_tags']:
+                    st.caption(f"#{tag.lower()}")
             
+            if lastfm_summary['bio_snippet']:
+                st.divider()
+                st.write("**Bio Summary**")
+                st.caption(lastfm_summary['bio_snippet'])
+        else:
+            st.warning("No Last.fm data available")
+
+@st.fragment
+def display_ar_report():
+    """Display AI-generated A&R report, streaming it in if still being generated
+
+    Runs as a fragment reading the analyzed artist from session state, so its
+    reruns are isolated from the data and taste tabs.
+    """
+    artist_data = st.session_state.get('artist_data')
+    ar_report = st.session_state.get('ar_report')
+    if not artist_data or not ar_report:
+        return
+
+    try:
+        lastfm_summary = ar_report['lastfm']
+
+        if ar_report['report'] or ar_report['job']:
             # Enhanced report display with Last.fm data
             st.subheader("🎯 A&R Analysis Report")
             
             # Add data summary tiles
             cols = st.columns(3)
-            if lastfm_data:
-                cols[0].metric("Community Tags", ", ".join(lastfm_data.get('tags', [])[:3]))
-                cols[1].metric("Crowd Similar Artists", len(lastfm_data.get('similar', [])))
-                cols[2].metric("Bio Length", f"{len(lastfm_data.get('bio', ''))} chars")
+            if lastfm_summary:
+                cols[0].metric("Community Tags", lastfm_summary['top_tags_label'])
+                cols[1].metric("Crowd Similar Artists", lastfm_summary['similar_count'])
+                cols[2].metric("Bio Length", f"{lastfm_summary['bio_length']} chars")
             
-            # Display full analysis
-            st.markdown(report)
+            # Display full analysis, rendering tokens as they arrive on first view
+            if not ar_report['report']:
+                ar_report['report'] = st.write_stream(ar_report['job'].stream())
+            else:
+                st.markdown(ar_report['report'])
+
+            # Build the download payload once per report rather than on every rerun
+            if ar_report['download'] is None:
+                ar_report['download'] = format_report_download(artist_data, lastfm_summary, ar_report['report'])
             
             # Update download data with Last.fm info
             st.download_button(
                 label="Download Full Report",
-                data=f"""A&R Report for {artist_data['profile']['name']}
-                Last.fm Insights:
-                - Similar Artists: {', '.join(lastfm_data.get('similar', [])) if lastfm_data else 'N/A'}
-                - Top Tags: {', '.join(lastfm_data.get('tags', [])) if lastfm_data else 'N/A'}
-                - Bio Summary: {lastfm_data.get('bio', 'N/A')[:500] if lastfm_data else 'N/A'}
-                
-                {report}""",
-                file_name=f"ar_report_{artist_data['profile']['name'].lower().replace(' ', '_')}.txt",
+                data=ar_report['download'],
+                file_name=f"ar_report_{artist_slug(artist_data['profile']['name'])}.txt",
                 mime="text/plain"
             )
             
     except Exception as e:
+        # Drop the failed completion so the next Analyze click starts a fresh one
+        ar_report['job'] = None
         st.error(f"Error generating A&R report: {str(e)}")
 
-def display_artist_data(artist_data):
+def display_artist_data(artist_data, albums):
     """Display artist data in a structured format"""
     if not artist_data:
         st.error("Unable to fetch artist data. Please check the artist ID or URL.")
@@ -115,6 +290,10 @@ def display_artist_data(artist_data):
     # Related Artists
     if artist_data.get('related_artists'):
         st.subheader("Similar Artists")
+        # Prefetch the smallest thumbnail of every artist in one batch; Spotify lists images largest first
+        images = fetch_images(tuple(
+            artist['images'][-1]['url'] for artist in artist_data['related_artists'] if artist['images']
+        ))
         cols = st.columns(3)
         for idx, artist in enumerate(artist_data['related_artists']):
             with cols[idx % 3]:
@@ -122,14 +301,13 @@ def display_artist_data(artist_data):
                 st.write(f"Genres: {', '.join(artist['genres']) if artist['genres'] else 'No genres available'}")
                 st.metric("Popularity", artist['popularity'])
                 if artist['images']:
-                    st.image(artist['images'][0]['url'], width=100)
+                    image_url = artist['images'][-1]['url']
+                    st.image(images.get(image_url, image_url), width=100)
                 st.write(f"[Open in Spotify]({artist['external_urls']['spotify']})")
     else:
         st.write("No similar artists available.")
 
-    # Fetch and display albums
-    spotify = SpotifyAnalyzer()
-    albums = spotify.get_artist_albums(artist_data['profile']['id'])
+    # Display albums
     if albums:
         st.subheader("Albums")
         for album in albums:
@@ -139,6 +317,7 @@ def display_artist_data(artist_data):
     else:
         st.write("No albums available for this artist.")
 
+@st.fragment
 def display_taste_analysis():
     """Display user's music taste analysis"""
     st.subheader("Your Music Taste Analysis")
@@ -155,35 +334,56 @@ def display_taste_analysis():
 
     if st.button("Analyze My Music Taste"):
         with st.spinner("Analyzing your music preferences..."):
-            spotify = SpotifyAnalyzer()
+            spotify = get_spotify()
             analysis = spotify.analyze_user_taste(time_range=time_range[0])
             
             if analysis:
-                # Display track data
+                # Skip the LLM round-trip when there is nothing to analyze
+                if not analysis['tracks_data'] or not analysis.get('analysis_prompt'):
+                    st.warning("Not enough listening data to analyze")
+                    return
+
+                # Display track data as a single table instead of per-track widgets
                 st.write("### Your Top Tracks")
-                for track in analysis['tracks_data']:
-                    with st.expander(f"{track['name']} by {track['artist']}"):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write("**Genres:**", ", ".join(track['genres']))
-                            st.metric("Popularity", track['popularity'])
-                        with col2:
-                            for name, value in track['features'].items():
-                                st.metric(name.title(), f"{value:.2f}")
-
-                # Generate AI insights using imported client
-                response = client.chat.completions.create(
-                    model="deepseek-chat",
-                    messages=[
-                        {"role": "system", "content": "You are an expert music analyst specializing in user behavior and music trends."},
-                        {"role": "user", "content": analysis['analysis_prompt']}
-                    ],
-                    temperature=0.7,
-                    max_tokens=1000
-                )
-                
+                tracks_df = pd.DataFrame([
+                    {
+                        'Track': track['name'],
+                        'Artist': track['artist'],
+                        'Genres': ", ".join(track['genres']),
+                        'Popularity': track['popularity'],
+                        **{name.title(): value for name, value in track['features'].items()}
+                    }
+                    for track in analysis['tracks_data']
+                ])
+                st.dataframe(tracks_df.round(2), width='stretch', hide_index=True)
+
+                # Stream AI insights as they are generated
                 st.write("### AI Insights")
-                st.markdown(response.choices[0].message.content)
+                st.write_stream(ChatJob(TASTE_SYSTEM_PROMPT, analysis['analysis_prompt']).stream())
+
+def analyze_artist(artist_id):
+    """Fetch artist data and start the A&R report pipeline, storing both in session state"""
+    spotify = get_spotify()
+    try:
+        artist_data = cached_artist_data(artist_id)
+    except LookupError:
+        artist_data = None
+    st.session_state['artist_data'] = artist_data
+    st.session_state['last_artist_id'] = artist_id
+    st.session_state.pop('ar_report', None)
+    
+    # Only generate the A&R report if artist_data is valid
+    if artist_data:
+        lastfm_data = artist_data.get('lastfm')
+        prompt = spotify.generate_ar_report(artist_data, lastfm_data)
+        st.session_state['ar_report'] = {
+            'lastfm': summarize_lastfm(lastfm_data),
+            'albums': artist_data.get('albums', []),
+            # Start the LLM now so it generates while the artist page renders
+            'job': ChatJob(AR_SYSTEM_PROMPT, prompt) if prompt else None,
+            'report': None,
+            'download': None
+        }
 
 def main():
     # Main app content
@@ -202,20 +402,29 @@ def main():
         if st.button("Analyze Artist"):
             if artist_input:
                 with st.spinner("Analyzing artist..."):
-                    spotify = SpotifyAnalyzer()
-                    artist_id = spotify.extract_artist_id(artist_input)
+                    artist_id = get_spotify().extract_artist_id(artist_input)
                     if artist_id:
-                        artist_data = spotify.get_artist_data(artist_id)
-                        display_artist_data(artist_data)
-                        
-                        # Only generate the A&R report if artist_data is valid
-                        if artist_data:
-                            with report_tab:
-                                display_ar_report(artist_data)
+                        ar_report = st.session_state.get('ar_report')
+                        # Only rerun the pipeline for a new artist or one whose report never completed
+                        if (artist_id != st.session_state.get('last_artist_id')
+                                or not ar_report or not (ar_report['report'] or ar_report['job'])):
+                            analyze_artist(artist_id)
                     else:
                         st.error("Invalid artist URL or ID")
             else:
                 st.warning("Please enter an artist URL or ID")
+
+        # Keep the last analyzed artist on screen across reruns
+        if 'artist_data' in st.session_state:
+            artist_data = st.session_state['artist_data']
+            ar_report = st.session_state.get('ar_report')
+            display_artist_data(artist_data, ar_report['albums'] if ar_report else [])
+            if ar_report:
+                # Sidebar output is not allowed inside fragments
+                display_lastfm_insights(ar_report['lastfm'])
+
+    with report_tab:
+        display_ar_report()
     
     with taste_tab:
         display_taste_analysis()
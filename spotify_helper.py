@@ -1,30 +1,339 @@
 import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
+from spotipy.exceptions import SpotifyException
+from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOauthError
 import os
 from dotenv import load_dotenv
 import time
-from typing import Dict, List, Optional
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
 import socket
+import atexit
+import re
+import threading
+import numpy as np
+import orjson
 import requests
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 load_dotenv()
 
 LASTFM_API_KEY = os.getenv('LASTFM_API_KEY')
+LASTFM_API_URL = 'https://ws.audioscrobbler.com/2.0/'
+LASTFM_TIMEOUT = 5  # seconds
+
+# Prompt budget for A&R reports: enough context for the analysis without inflating input tokens
+PROMPT_MAX_GENRES = 3
+PROMPT_MAX_ITEMS = 5
+PROMPT_MAX_BIO_CHARS = 250
+
+POOL_CONNECTIONS = 10  # distinct hosts kept warm
+POOL_MAXSIZE = 20  # keep-alive connections per host
+MAX_WORKERS = 8  # concurrent Spotify requests per fan-out
+
+# Spotify IDs are 22 base62 characters, in open.spotify.com URLs or spotify: URIs
+_TRACK_RE = re.compile(r'track[/:]([A-Za-z0-9]{22})(?![A-Za-z0-9])')
+_ARTIST_RE = re.compile(r'artist[/:]([A-Za-z0-9]{22})(?![A-Za-z0-9])')
+_BARE_ID_RE = re.compile(r'[A-Za-z0-9]{22}')
+ARTISTS_BATCH_SIZE = 50  # Spotify's limit for GET /v1/artists?ids=
+AUDIO_FEATURES_BATCH_SIZE = 100  # Spotify's limit for GET /v1/audio-features?ids=
+PAGE_LIMIT = 50  # Spotify's maximum page size for offset-paginated endpoints
+AVG_FEATURE_KEYS = ('danceability', 'energy', 'valence', 'tempo', 'instrumentalness', 'speechiness')
+LOOKUP_CACHE_TTL = 3600  # seconds catalog lookups are reused without hitting Spotify
+ANALYSIS_CACHE_SIZE = 32  # audio analyses carry every segment, so keep only a few
+SPOTIFY_RATE = 10  # requests per second, with bursts up to one fan-out
+LASTFM_RATE = 5  # requests per second, Last.fm's published limit
+RATE_LIMIT_RETRIES = 3  # attempts after a 429 before the error is surfaced
+MAX_RETRY_AFTER = 30  # seconds; longer penalties fail fast instead of stalling the app
+
+# Failures of the Spotify API, its token endpoint or the transport; anything else is a bug and propagates
+SPOTIFY_ERRORS = (SpotifyException, SpotifyOauthError, requests.RequestException)
+
+
+class LeakyBucket:
+    """Thread-safe leaky bucket that spaces requests out to a steady rate, allowing short bursts"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1.0 / rate
+        self.capacity = burst * self.interval
+        self._drained_at = time.monotonic()  # when the bucket will be empty again
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until another request fits in the bucket"""
+        with self._lock:
+            now = time.monotonic()
+            self._drained_at = max(self._drained_at, now) + self.interval
+            wait = self._drained_at - now - self.capacity
+        if wait > 0:
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for at least seconds, e.g. for a server's Retry-After"""
+        with self._lock:
+            self._drained_at = max(self._drained_at, time.monotonic() + seconds + self.capacity)
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTP adapter that takes a slot from a shared LeakyBucket before each request and backs off on 429"""
+
+    def __init__(self, bucket: LeakyBucket, **kwargs):
+        super().__init__(**kwargs)
+        self.bucket = bucket
+
+    @staticmethod
+    def _retry_after(response) -> Optional[int]:
+        """Seconds to wait before retrying a 429, or None if the response should be returned as is"""
+        if response.status_code != 429:
+            return None
+        value = response.headers.get('Retry-After', '')
+        delay = int(value) if value.isdigit() else 1
+        return delay if delay <= MAX_RETRY_AFTER else None
+
+    def send(self, request, **kwargs):
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            self.bucket.acquire()
+            response = super().send(request, **kwargs)
+            delay = self._retry_after(response)
+            if delay is None or attempt == RATE_LIMIT_RETRIES:
+                return response
+            # Pausing the shared bucket holds back every thread, so retries don't pile onto the limit
+            response.close()
+            self.bucket.pause(delay)
+
+
+class ConditionalCacheAdapter(RateLimitedAdapter):
+    """HTTP adapter that serves fresh GET responses from memory and revalidates stale ones with If-None-Match"""
+
+    def __init__(self, bucket: LeakyBucket, default_ttl: int = 120, maxsize: int = 512,
+                 skip_paths: Tuple[str, ...] = (), **kwargs):
+        super().__init__(bucket, **kwargs)
+        self.default_ttl = default_ttl
+        self.maxsize = maxsize
+        self.skip_paths = skip_paths  # path prefixes never stored, e.g. bodies too large to keep
+        self._cache = {}  # (url, auth) -> (etag, (status, headers, content), expires_at)
+        self._lock = threading.Lock()
+
+    def _freshness(self, response) -> Optional[int]:
+        """Seconds a response may be reused without revalidation, or None if it must not be stored"""
+        cache_control = response.headers.get('Cache-Control', '')
+        if 'no-store' in cache_control:
+            return None
+        match = re.search(r'max-age=(\d+)', cache_control)
+        return int(match.group(1)) if match else self.default_ttl
+
+    @staticmethod
+    def _replay(request, stored) -> requests.Response:
+        """Fresh Response for a stored (status, headers, content), so concurrent callers never share one"""
+        status, headers, content = stored
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = content
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def send(self, request, **kwargs):
+        if request.method != 'GET' or request.path_url.startswith(self.skip_paths):
+            return super().send(request, **kwargs)
+
+        key = (request.url, request.headers.get('Authorization'))
+        with self._lock:
+            entry = self._cache.get(key)
+
+        if entry:
+            etag, stored, expires_at = entry
+            if time.monotonic() < expires_at:
+                return self._replay(request, stored)
+            if etag:
+                request.headers['If-None-Match'] = etag
+
+        response = super().send(request, **kwargs)
+
+        if response.status_code == 304 and entry:
+            # Not modified: keep the stored body and extend its lifetime
+            response.close()
+            ttl = self._freshness(response) or 0
+            with self._lock:
+                self._cache[key] = (etag, stored, time.monotonic() + ttl)
+            return self._replay(request, stored)
+
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            ttl = self._freshness(response)
+            if ttl is not None and (etag or ttl > 0):
+                stored = (response.status_code, dict(response.headers), response.content)
+                with self._lock:
+                    self._cache[key] = (etag, stored, time.monotonic() + ttl)
+                    if len(self._cache) > self.maxsize:
+                        self._cache.pop(next(iter(self._cache)))
+
+        return response
+
+
+def _build_session() -> requests.Session:
+    """Requests session with retries and rate limits for Spotify and Last.fm, plus conditional caching for the Spotify Web API"""
+    # 429s are left to RateLimitedAdapter, which backs off the whole bucket on Retry-After;
+    # urllib3 would otherwise retry them itself and sleep for any Retry-After, however long
+    retry = Retry(
+        total=3,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+        status=3,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        respect_retry_after_header=False
+    )
+    # Pools sized for the concurrent fetches issued by the app's threads and event loop
+    pool = dict(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(**pool))
+    session.mount('https://', HTTPAdapter(**pool))
+    # Served-from-cache responses return before the bucket, so only real requests are paced
+    spotify_bucket = LeakyBucket(SPOTIFY_RATE, burst=SPOTIFY_RATE)
+    # Audio analyses run to megabytes and are already kept, capped, in _analysis_cache
+    session.mount('https://api.spotify.com/', ConditionalCacheAdapter(
+        spotify_bucket, skip_paths=('/v1/audio-analysis/',), **pool
+    ))
+
+    # Last.fm lookups are idempotent GETs, so transient failures are retried with backoff
+    lastfm_retry = Retry(
+        total=3, backoff_factor=0.5, status_forcelist=(500, 502, 503), respect_retry_after_header=False
+    )
+    session.mount(LASTFM_API_URL, RateLimitedAdapter(
+        LeakyBucket(LASTFM_RATE, burst=LASTFM_RATE),
+        pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=lastfm_retry
+    ))
+    return session
+
+
+# Module-wide session so every SpotifyAnalyzer shares one set of warm connections
+_session = _build_session()
+atexit.register(_session.close)
+
+# Process-wide cache-aside store for catalog lookups, keyed by (endpoint, ID)
+_lookup_cache = TTLCache(maxsize=4096, ttl=LOOKUP_CACHE_TTL)
+_analysis_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=LOOKUP_CACHE_TTL)
+_lookup_lock = threading.Lock()
+
 
 class SpotifyAnalyzer:
     def __init__(self):
         try:
+            # One pooled session for token requests, API calls and Last.fm keeps connections alive
+            self.session = _session
+
             # Initialize with client credentials for public data only
             credentials = SpotifyClientCredentials(
                 client_id=os.getenv('SPOTIFY_CLIENT_ID'),
-                client_secret=os.getenv('SPOTIFY_CLIENT_SECRET')
+                client_secret=os.getenv('SPOTIFY_CLIENT_SECRET'),
+                requests_session=self.session
+            )
+            self.sp = spotipy.Spotify(
+                client_credentials_manager=credentials,
+                requests_session=self.session
             )
-            self.sp = spotipy.Spotify(client_credentials_manager=credentials)
             
         except Exception as e:
             print(f"Spotify initialization error: {e}")
             raise
 
+    def _cached(self, endpoint: str, key: str, fetch, cache: TTLCache = _lookup_cache):
+        """Return the cached result for (endpoint, key), calling fetch() on a miss"""
+        with _lookup_lock:
+            result = cache.get((endpoint, key))
+        if result is None:
+            result = fetch()
+            if result is not None:
+                with _lookup_lock:
+                    cache[(endpoint, key)] = result
+        return result
+
+    def _artist(self, artist_id: str) -> Optional[Dict]:
+        """Artist object for an ID, cached"""
+        return self._artists([artist_id]).get(artist_id)
+
+    def _artists(self, artist_ids: List[str]) -> Dict[str, Dict]:
+        """Artist objects keyed by ID, fetching only uncached artists in batches of up to 50"""
+        unique_ids = list(dict.fromkeys(artist_ids))
+        with _lookup_lock:
+            artists = {aid: _lookup_cache.get(('artist', aid)) for aid in unique_ids}
+        missing = [aid for aid, artist in artists.items() if artist is None]
+        for start in range(0, len(missing), ARTISTS_BATCH_SIZE):
+            batch = self.sp.artists(missing[start:start + ARTISTS_BATCH_SIZE])['artists']
+            self._remember_artists(batch)
+            artists.update((artist['id'], artist) for artist in batch if artist)
+        return {aid: artist for aid, artist in artists.items() if artist is not None}
+
+    def _remember_artists(self, artists: List[Dict]):
+        """Cache full artist objects that arrived as part of another response"""
+        with _lookup_lock:
+            for artist in artists:
+                if artist:
+                    _lookup_cache[('artist', artist['id'])] = artist
+
+    def _track(self, track_id: str) -> Dict:
+        """Track object for an ID, cached"""
+        return self._cached('track', track_id, lambda: self.sp.track(track_id))
+
+    def _audio_analysis(self, track_id: str) -> Dict:
+        """Audio analysis for a track, cached so both track analyzers share one request"""
+        return self._cached(
+            'audio_analysis', track_id, lambda: self.sp.audio_analysis(track_id), cache=_analysis_cache
+        )
+
+    def _artist_top_tracks(self, artist_id: str, market: str = 'US') -> Dict:
+        """Top tracks response for an artist and market, cached"""
+        return self._cached(
+            'artist_top_tracks',
+            f"{artist_id}:{market}",
+            lambda: self.sp.artist_top_tracks(artist_id, country=market)
+        )
+
+    def _audio_features(self, track_ids) -> List[Optional[Dict]]:
+        """Audio features in the order of track_ids, fetching only uncached tracks in batches of up to 100"""
+        if isinstance(track_ids, str):
+            track_ids = [track_ids]
+        with _lookup_lock:
+            features = {tid: _lookup_cache.get(('audio_features', tid)) for tid in track_ids}
+        missing = [tid for tid, feature in features.items() if feature is None]
+        for start in range(0, len(missing), AUDIO_FEATURES_BATCH_SIZE):
+            batch = missing[start:start + AUDIO_FEATURES_BATCH_SIZE]
+            fetched = self.sp.audio_features(batch) or []
+            with _lookup_lock:
+                for tid, feature in zip(batch, fetched):
+                    features[tid] = feature
+                    if feature is not None:
+                        _lookup_cache[('audio_features', tid)] = feature
+        return [features[tid] for tid in track_ids]
+
+    def _paginate(self, fetch, limit: Optional[int] = None) -> List[Dict]:
+        """Items of an offset-paginated endpoint, up to limit or every page, fetching pages concurrently"""
+        items, start = [], 0
+        if limit is None:
+            # The first page reports the total, then the remaining offsets fan out
+            first = fetch(limit=PAGE_LIMIT, offset=0)
+            items, limit, start = first['items'], first['total'], PAGE_LIMIT
+
+        def page(offset):
+            return fetch(limit=min(PAGE_LIMIT, limit - offset), offset=offset)['items']
+
+        offsets = range(start, limit, PAGE_LIMIT)
+        if len(offsets) <= 1:
+            pages = map(page, offsets)
+        else:
+            with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(offsets))) as executor:
+                pages = list(executor.map(page, offsets))
+        return items + [item for items_page in pages for item in items_page]
+
     def _find_free_port(self):
         """Find a free port to use for the OAuth callback"""
         with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
@@ -39,7 +348,7 @@ class SpotifyAnalyzer:
             # Get the auth URL
             auth_url = self.auth_manager.get_authorize_url()
             return auth_url
-        except Exception as e:
+        except (SpotifyOauthError, requests.RequestException) as e:
             print(f"Error getting auth URL: {e}")
             return None
 
@@ -47,29 +356,24 @@ class SpotifyAnalyzer:
         """Check if current token is valid"""
         try:
             return self.sp.current_user() is not None
-        except:
+        except SPOTIFY_ERRORS:
             return False
 
     def get_current_user(self):
         """Get current user's profile"""
         try:
             return self.sp.current_user()
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error getting user profile: {e}")
             return None
 
     def get_top_tracks(self, time_range='short_term', limit=25):
         """Get user's top tracks"""
         try:
-            results = self.sp.current_user_top_tracks(
-                limit=limit,
-                offset=0,
-                time_range=time_range
-            )
+            items = self._paginate(partial(self.sp.current_user_top_tracks, time_range=time_range), limit)
             
-            tracks = []
-            for item in results['items']:
-                track_data = {
+            return [
+                {
                     'id': item['id'],
                     'name': item['name'],
                     'artist': item['artists'][0]['name'],
@@ -77,11 +381,10 @@ class SpotifyAnalyzer:
                     'preview_url': item['preview_url'],
                     'external_url': item['external_urls']['spotify']
                 }
-                tracks.append(track_data)
-                
-            return tracks
+                for item in items
+            ]
             
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error getting top tracks: {e}")
             return None
 
@@ -92,20 +395,26 @@ class SpotifyAnalyzer:
             if not track_id:
                 return None
 
-            # Get audio analysis
-            audio_analysis = self.sp.audio_analysis(track_id)
-            
-            # Get audio features
-            audio_features = self.sp.audio_features([track_id])[0]
-            
-            # Get track metadata
-            track_info = self.sp.track(track_id)
+            # Audio analysis, audio features and track metadata are independent requests
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                analysis_future = executor.submit(self._audio_analysis, track_id)
+                features_future = executor.submit(self._audio_features, [track_id])
+                track_future = executor.submit(self._track, track_id)
+                audio_analysis = analysis_future.result()
+                audio_features = features_future.result()[0]
+                track_info = track_future.result()
+            if audio_features is None:
+                print(f"Error analyzing track: no audio features for {track_id}")
+                return None
             
             # Get first 30 seconds of segments
-            segments_30s = [
-                segment for segment in audio_analysis['segments']
-                if segment['start'] < 30.0
-            ]
+            segments_30s = self._first_30s(audio_analysis['segments'])
+            if not segments_30s:
+                print(f"Error analyzing track: no segments in the first 30 seconds of {track_id}")
+                return None
+            timbre, pitches, loudness = self._segment_arrays(segments_30s)
+            # Track-level tempo, key, mode and meter come with the analysis itself
+            track_summary = audio_analysis['track']
             
             # Extract key musical features from the first 30 seconds
             analysis = {
@@ -116,82 +425,86 @@ class SpotifyAnalyzer:
                     'popularity': track_info['popularity']
                 },
                 'audio_features': {
-                    'tempo': audio_features['tempo'],
-                    'key': audio_features['key'],
-                    'mode': audio_features['mode'],
-                    'time_signature': audio_features['time_signature'],
+                    'tempo': track_summary['tempo'],
+                    'key': track_summary['key'],
+                    'mode': track_summary['mode'],
+                    'time_signature': track_summary['time_signature'],
                     'danceability': audio_features['danceability'],
                     'energy': audio_features['energy'],
                     'valence': audio_features['valence'],
                     'instrumentalness': audio_features['instrumentalness']
                 },
                 'first_30s_analysis': {
-                    'average_loudness': sum(s['loudness_max'] for s in segments_30s) / len(segments_30s),
+                    'average_loudness': float(loudness.mean()),
                     'segment_count': len(segments_30s),
-                    'pitch_variety': self._analyze_pitch_variety(segments_30s),
-                    'timbre_variety': self._analyze_timbre_variety(segments_30s)
+                    'pitch_variety': self._row_sum_stats(pitches),
+                    'timbre_variety': self._row_sum_stats(timbre)
                 }
             }
             
             return analysis
             
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error analyzing track: {str(e)}")
             return None
 
-    def _analyze_pitch_variety(self, segments):
-        """Analyze pitch variety in segments"""
-        if not segments:
-            return None
-            
-        # Calculate average pitches across segments
-        pitch_sums = [sum(segment['pitches']) for segment in segments]
-        return {
-            'max': max(pitch_sums),
-            'min': min(pitch_sums),
-            'average': sum(pitch_sums) / len(pitch_sums)
-        }
-
-    def _analyze_timbre_variety(self, segments):
-        """Analyze timbre variety in segments"""
-        if not segments:
-            return None
-            
-        # Calculate average timbre across segments
-        timbre_sums = [sum(segment['timbre']) for segment in segments]
+    @staticmethod
+    def _first_30s(segments: List[Dict]) -> List[Dict]:
+        """Segments starting in the first 30 seconds, found by binary search on the sorted start times"""
+        return segments[:bisect_left(segments, 30.0, key=lambda segment: segment['start'])]
+
+    @staticmethod
+    def _segment_arrays(segments: List[Dict]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(segments, 12) timbre and pitch matrices plus loudness_max, filled in a single pass"""
+        count = len(segments)
+        timbre = np.empty((count, 12))
+        pitches = np.empty((count, 12))
+        loudness = np.empty(count)
+        for i, segment in enumerate(segments):
+            timbre[i] = segment['timbre']
+            pitches[i] = segment['pitches']
+            loudness[i] = segment['loudness_max']
+        return timbre, pitches, loudness
+
+    @staticmethod
+    def _row_sum_stats(values: np.ndarray) -> Dict:
+        """Max, min and mean of the per-row sums of a (segments, 12) array, e.g. pitch or timbre variety"""
+        sums = values.sum(axis=1)
         return {
-            'max': max(timbre_sums),
-            'min': min(timbre_sums),
-            'average': sum(timbre_sums) / len(timbre_sums)
+            'max': float(sums.max()),
+            'min': float(sums.min()),
+            'average': float(sums.mean())
         }
 
     def extract_track_id(self, spotify_url):
-        """Extract track ID from Spotify URL"""
-        try:
-            if 'track/' in spotify_url:
-                return spotify_url.split('track/')[1].split('?')[0]
-            return None
-        except Exception as e:
-            print(f"Error extracting track ID: {str(e)}")
-            return None
+        """Extract track ID from Spotify URL, URI or bare ID"""
+        return self._extract_id(_TRACK_RE, spotify_url)
 
     def analyze_track(self, track_id):
         """Comprehensive track analysis combining basic info, audio features, and audio analysis"""
         try:
-            # Get basic track info
-            track_info = self.sp.track(track_id)
-            
-            # Get audio features
-            features = self.sp.audio_features(track_id)[0]
-            
-            # Get detailed audio analysis
-            analysis = self.sp.audio_analysis(track_id)
+            # Basic info, audio features and detailed audio analysis are independent requests
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                track_future = executor.submit(self._track, track_id)
+                features_future = executor.submit(self._audio_features, track_id)
+                analysis_future = executor.submit(self._audio_analysis, track_id)
+                track_info = track_future.result()
+                features = features_future.result()[0]
+                analysis = analysis_future.result()
+            if features is None:
+                print(f"Error analyzing track: no audio features for {track_id}")
+                return None
             
             # Extract first 30 seconds segments
-            segments_30s = [
-                segment for segment in analysis['segments'] 
-                if segment['start'] < 30.0
-            ]
+            segments_30s = self._first_30s(analysis['segments'])
+            if not segments_30s:
+                print(f"Error analyzing track: no segments in the first 30 seconds of {track_id}")
+                return None
+
+            track_summary = analysis['track']
+
+            # Build (segments, 12) matrices once and average each coefficient column-wise
+            timbre, pitches, loudness = self._segment_arrays(segments_30s)
             
             return {
                 'basic_info': {
@@ -203,33 +516,27 @@ class SpotifyAnalyzer:
                 'audio_features': {
                     'danceability': features['danceability'],
                     'energy': features['energy'],
-                    'key': features['key'],
-                    'loudness': features['loudness'],
-                    'mode': features['mode'],
+                    'key': track_summary['key'],
+                    'loudness': track_summary['loudness'],
+                    'mode': track_summary['mode'],
                     'speechiness': features['speechiness'],
                     'acousticness': features['acousticness'],
                     'instrumentalness': features['instrumentalness'],
                     'liveness': features['liveness'],
                     'valence': features['valence'],
-                    'tempo': features['tempo']
+                    'tempo': track_summary['tempo']
                 },
                 'audio_analysis': {
                     'sections': len(analysis['sections']),
                     'segments_30s': {
                         'count': len(segments_30s),
-                        'avg_loudness': sum(s['loudness_max'] for s in segments_30s) / len(segments_30s),
-                        'avg_timbre': [
-                            sum(s['timbre'][i] for s in segments_30s) / len(segments_30s)
-                            for i in range(12)
-                        ],
-                        'avg_pitches': [
-                            sum(s['pitches'][i] for s in segments_30s) / len(segments_30s)
-                            for i in range(12)
-                        ]
+                        'avg_loudness': float(loudness.mean()),
+                        'avg_timbre': timbre.mean(axis=0).tolist(),
+                        'avg_pitches': pitches.mean(axis=0).tolist()
                     }
                 }
             }
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error analyzing track: {str(e)}")
             return None
 
@@ -241,10 +548,16 @@ class SpotifyAnalyzer:
                 return None
 
             # Get track metadata
-            track_info = self.sp.track(track_id)
-            audio_features = self.sp.audio_features([track_id])[0]
+            track_info = self._track(track_id)
+            audio_features = self._audio_features([track_id])[0]
+            if audio_features is None:
+                print(f"Error getting track features: no audio features for {track_id}")
+                return None
             artist_id = track_info['artists'][0]['id']
-            artist_info = self.sp.artist(artist_id)
+            artist_info = self._artist(artist_id)
+            if not artist_info:
+                print(f"Error getting track features: no artist found for {artist_id}")
+                return None
 
             return {
                 'track_name': track_info['name'],
@@ -264,19 +577,31 @@ class SpotifyAnalyzer:
                     'instrumentalness': audio_features['instrumentalness']
                 }
             }
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error analyzing track: {str(e)}")
             return None
 
-    def get_artist_data(self, artist_id: str) -> Optional[Dict]:
-        """Get artist data using the Spotify API"""
+    def get_artist_data(self, artist_id: str, include_lastfm: bool = False,
+                        include_albums: bool = False) -> Optional[Dict]:
+        """Get artist data using the Spotify API, optionally with Last.fm data and albums under 'lastfm' and 'albums'"""
         try:
-            artist = self.sp.artist(artist_id)
+            # Profile, top tracks, related artists and albums are independent requests
+            with ThreadPoolExecutor(max_workers=5) as executor:
+                artist_future = executor.submit(self._artist, artist_id)
+                top_tracks_future = executor.submit(self.get_artist_top_tracks, artist_id)
+                related_future = executor.submit(self.get_artist_related_artists, artist_id)
+                albums_future = executor.submit(self.get_artist_albums, artist_id) if include_albums else None
+                artist = artist_future.result()
+                # Last.fm only needs the name, so it overlaps the remaining Spotify calls
+                lastfm_future = None
+                if include_lastfm and artist and 'error' not in artist:
+                    lastfm_future = executor.submit(self.get_lastfm_data, artist['name'])
+
             if not artist or 'error' in artist:
                 print(f"Error fetching artist data: {artist}")
                 return None
             
-            return {
+            data = {
                 'profile': {
                     'id': artist['id'],
                     'name': artist['name'],
@@ -286,73 +611,91 @@ class SpotifyAnalyzer:
                     'image_url': artist['images'][0]['url'] if artist['images'] else None,
                     'spotify_url': artist['external_urls']['spotify']
                 },
-                'top_tracks': self.get_artist_top_tracks(artist_id),
-                'related_artists': self.get_artist_related_artists(artist_id)
+                'top_tracks': top_tracks_future.result(),
+                'related_artists': related_future.result()
             }
-        except Exception as e:
+            if lastfm_future:
+                data['lastfm'] = lastfm_future.result()
+            if albums_future:
+                data['albums'] = albums_future.result()
+            return data
+        except SPOTIFY_ERRORS as e:
             print(f"Error fetching artist data: {e}")
             return None
 
     def get_artist_top_tracks(self, artist_id: str, market: str = 'US') -> List[Dict]:
         """Get top tracks for a given artist"""
         try:
-            return self.sp.artist_top_tracks(artist_id, market=market)['tracks']
-        except Exception as e:
+            return self._artist_top_tracks(artist_id, market)['tracks']
+        except SPOTIFY_ERRORS as e:
             print(f"Error fetching top tracks for artist {artist_id}: {e}")
             return []
 
     def get_artist_related_artists(self, artist_id: str) -> List[Dict]:
         """Get related artists for a given artist"""
         try:
-            return self.sp.artist_related_artists(artist_id)['artists']
-        except Exception as e:
+            related = self.sp.artist_related_artists(artist_id)['artists']
+            self._remember_artists(related)
+            return related
+        except SPOTIFY_ERRORS as e:
             print(f"Error fetching related artists for {artist_id}: {e}")
             return []
 
+    def get_artists_bulk(self, artist_ids: List[str]) -> Dict[str, Dict]:
+        """Get full artist objects keyed by ID, batching up to 50 uncached IDs per request"""
+        try:
+            return self._artists(artist_ids)
+        except SPOTIFY_ERRORS as e:
+            print(f"Error fetching artists {artist_ids}: {e}")
+            return {}
+
     def get_artist_albums(self, artist_id: str, include_groups: str = "album,single") -> List[Dict]:
         """Get albums for a given artist"""
         try:
             return self.sp.artist_albums(artist_id, include_groups=include_groups)['items']
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error fetching albums for artist {artist_id}: {e}")
             return []
 
     def extract_artist_id(self, url: str) -> Optional[str]:
-        """Extract artist ID from Spotify URL or URI"""
-        try:
-            if 'artist/' in url:
-                artist_id = url.split('artist/')[1].split('?')[0]
-            elif 'spotify:artist:' in url:
-                artist_id = url.split('spotify:artist:')[1]
-            else:
-                artist_id = url
-            return artist_id
-        except Exception as e:
-            print(f"Error extracting artist ID: {e}")
-            return None
+        """Extract artist ID from Spotify URL, URI or bare ID"""
+        return self._extract_id(_ARTIST_RE, url)
+
+    @staticmethod
+    def _extract_id(pattern: re.Pattern, value: str) -> Optional[str]:
+        """Match a Spotify URL/URI against pattern, falling back to a bare ID"""
+        value = value.strip()
+        match = pattern.search(value)
+        if match:
+            return match.group(1)
+        return value if _BARE_ID_RE.fullmatch(value) else None
 
     def get_artist_analysis(self, artist_id: str) -> Optional[Dict]:
         """Get comprehensive artist analysis including top tracks and related artists"""
         try:
-            # Get artist profile
-            artist = self.sp.artist(artist_id)
-            
-            # Get artist's top tracks
-            top_tracks = self.sp.artist_top_tracks(artist_id)
-            
-            # Get related artists
-            related = self.sp.artist_related_artists(artist_id)
-            
-            # Get artist's albums
-            albums = self.sp.artist_albums(
-                artist_id, 
-                album_type='album,single', 
-                limit=50
-            )
-
-            # Analyze top tracks audio features
-            track_ids = [track['id'] for track in top_tracks['tracks']]
-            audio_features = self.sp.audio_features(track_ids)
+            # Profile, top tracks, related artists and albums are fetched concurrently
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                artist_future = executor.submit(self._artist, artist_id)
+                top_tracks_future = executor.submit(self._artist_top_tracks, artist_id)
+                related_future = executor.submit(self.sp.artist_related_artists, artist_id)
+                albums_future = executor.submit(
+                    self._paginate,
+                    partial(self.sp.artist_albums, artist_id, include_groups='album,single')
+                )
+
+                # Audio features only need the top tracks, so request them while the rest are in flight
+                top_tracks = top_tracks_future.result()
+                track_ids = [track['id'] for track in top_tracks['tracks']]
+                audio_features = self._audio_features(track_ids)
+
+                artist = artist_future.result()
+                related = related_future.result()
+                self._remember_artists(related['artists'])
+                albums = albums_future.result()
+
+            if not artist:
+                print(f"Error analyzing artist: no artist found for {artist_id}")
+                return None
 
             analysis = {
                 'profile': {
@@ -376,15 +719,15 @@ class SpotifyAnalyzer:
                     'popularity': artist['popularity']
                 } for artist in related['artists'][:5]],
                 'discography': {
-                    'total_albums': len(albums['items']),
-                    'latest_release': albums['items'][0] if albums['items'] else None,
-                    'earliest_release': albums['items'][-1] if albums['items'] else None
+                    'total_albums': len(albums),
+                    'latest_release': albums[0] if albums else None,
+                    'earliest_release': albums[-1] if albums else None
                 }
             }
             
             return analysis
             
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error analyzing artist: {e}")
             return None
 
@@ -393,63 +736,84 @@ class SpotifyAnalyzer:
         if not features:
             return {}
             
-        avg_features = {
-            'danceability': 0,
-            'energy': 0,
-            'valence': 0,
-            'tempo': 0,
-            'instrumentalness': 0,
-            'speechiness': 0
-        }
-        
         valid_features = [f for f in features if f is not None]
         if not valid_features:
-            return avg_features
-            
-        for feature in valid_features:
-            for key in avg_features.keys():
-                avg_features[key] += feature[key]
-                
-        for key in avg_features.keys():
-            avg_features[key] /= len(valid_features)
+            return dict.fromkeys(AVG_FEATURE_KEYS, 0)
             
-        return avg_features 
+        # One (tracks, features) matrix reduced column-wise instead of per-key accumulation
+        values = np.array([[f[key] for key in AVG_FEATURE_KEYS] for f in valid_features], dtype=float)
+        return dict(zip(AVG_FEATURE_KEYS, values.mean(axis=0).tolist()))
 
     def get_lastfm_data(self, artist_name: str) -> Optional[Dict]:
         """Get Last.fm artist data including similar artists and tags"""
         try:
-            url = f"http://ws.audioscrobbler.com/2.0/?method=artist.getinfo&artist={artist_name}&api_key={LASTFM_API_KEY}&format=json"
-            response = requests.get(url)
-            data = response.json()
+            # Let requests encode the query so names like "AC/DC" or "Simon & Garfunkel" survive
+            params = {
+                'method': 'artist.getinfo',
+                'artist': artist_name,
+                'api_key': LASTFM_API_KEY,
+                'format': 'json'
+            }
+            response = self.session.get(LASTFM_API_URL, params=params, timeout=LASTFM_TIMEOUT)
+            data = orjson.loads(response.content)
             
             return {
                 'similar': [a['name'] for a in data.get('artist', {}).get('similar', {}).get('artist', [])[:5]],
                 'tags': [t['name'] for t in data.get('artist', {}).get('tags', {}).get('tag', [])],
                 'bio': data.get('artist', {}).get('bio', {}).get('summary', '')
             }
-        except Exception as e:
+        except (requests.RequestException, orjson.JSONDecodeError) as e:
             print(f"Last.fm API error: {e}")
             return None
 
-    def generate_ar_report(self, artist_data) -> Optional[str]:
-        """Generate A&R report prompt from artist data"""
-        try:
-            lastfm_data = self.get_lastfm_data(artist_data['profile']['name'])
-            prompt = f"""As an AI-powered A&R specialist, analyze this artist's potential:
-            
-Artist: {artist_data['profile']['name']}
-Genres: {', '.join(artist_data['profile']['genres'])}
-Popularity: {artist_data['profile']['popularity']}/100
-Followers: {artist_data['profile']['followers']}
+    def generate_ar_report(self, artist_data, lastfm_data: Optional[Dict] = None) -> Optional[str]:
+        """Generate A&R report prompt from artist data, reusing Last.fm data if already fetched"""
+        if lastfm_data is None:
+            if 'lastfm' in artist_data:
+                lastfm_data = artist_data['lastfm']
+            else:
+                lastfm_data = self.get_lastfm_data(artist_data['profile']['name'])
+        # Bind everything the prompt needs once, so empty sections skip their joins and slicing
+        profile = artist_data['profile']
+        lastfm_data = lastfm_data or {}
+        similar = lastfm_data.get('similar')
+        tags = lastfm_data.get('tags')
+        bio = lastfm_data.get('bio')
+        top_tracks = artist_data.get('top_tracks')
+        related = artist_data.get('related_artists')
+
+        similar_names = ', '.join(similar[:PROMPT_MAX_ITEMS]) if similar else 'N/A'
+        top_tags = ', '.join(tags[:PROMPT_MAX_ITEMS]) if tags else 'N/A'
+        if not bio:
+            bio_snip = 'N/A'
+        elif len(bio) > PROMPT_MAX_BIO_CHARS:
+            bio_snip = bio[:PROMPT_MAX_BIO_CHARS] + '...'
+        else:
+            bio_snip = bio
+        top_track_names = (
+            ', '.join(track['name'] for track in top_tracks[:PROMPT_MAX_ITEMS])
+            if top_tracks else 'No top tracks available'
+        )
+        related_names = (
+            ', '.join(artist['name'] for artist in related[:PROMPT_MAX_ITEMS])
+            if related else 'No similar artists available'
+        )
+
+        prompt = f"""As an AI-powered A&R specialist, analyze this artist's potential:
+        
+Artist: {profile['name']}
+Genres: {', '.join(profile['genres'][:PROMPT_MAX_GENRES])}
+Popularity: {profile['popularity']}/100
+Followers: {profile['followers']}
 
 -- Last.fm Data --
-Similar Artists: {', '.join(lastfm_data['similar']) if lastfm_data and lastfm_data.get('similar') else 'N/A'}
-Top Tags: {', '.join(lastfm_data['tags']) if lastfm_data and lastfm_data.get('tags') else 'N/A'}
-Bio Summary: {lastfm_data['bio'][:300] + '...' if lastfm_data and lastfm_data.get('bio') else 'N/A'}
+Similar Artists: {similar_names}
+Top Tags: {top_tags}
+Bio Summary: {bio_snip}
 
 Spotify Analysis:
-Top Tracks: {', '.join(track['name'] for track in artist_data['top_tracks']) if artist_data.get('top_tracks') else 'No top tracks available'}
-Similar Artists: {', '.join(artist['name'] for artist in artist_data['related_artists']) if artist_data.get('related_artists') else 'No similar artists available'}
+Top Tracks: {top_track_names}
+Similar Artists: {related_names}
 
 Please provide a detailed A&R report covering:
 1. Market Position & Potential
@@ -458,35 +822,31 @@ Please provide a detailed A&R report covering:
 4. Strategic Recommendations
 
 Format the analysis in clear sections with bullet points where appropriate."""
-            return prompt
-        except Exception as e:
-            print(f"Error generating A&R report prompt: {e}")
-            return None
+        return prompt
 
     def analyze_user_taste(self, time_range='long_term', limit=5):
         """Analyze user's music taste based on top tracks"""
         try:
             # Get user's top tracks
-            top_tracks = self.sp.current_user_top_tracks(
-                limit=limit,
-                offset=0,
-                time_range=time_range
-            )
+            top_tracks = self._paginate(partial(self.sp.current_user_top_tracks, time_range=time_range), limit)
 
-            # Get audio features for all tracks
-            track_ids = [track['id'] for track in top_tracks['items']]
-            audio_features = self.sp.audio_features(track_ids)
+            # Get audio features for all tracks alongside each track's primary artist
+            track_ids = [track['id'] for track in top_tracks]
+            artist_ids = [track['artists'][0]['id'] for track in top_tracks]
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                features_future = executor.submit(self._audio_features, track_ids)
+                artists = self.get_artists_bulk(artist_ids)
+                audio_features = features_future.result()
 
             # Collect track and artist data
             tracks_data = []
-            for track, features in zip(top_tracks['items'], audio_features):
-                artist_id = track['artists'][0]['id']
-                artist_info = self.sp.artist(artist_id)
-                
+            for track, features, artist_id in zip(top_tracks, audio_features, artist_ids):
+                if features is None:
+                    continue  # local files and some regional releases have no audio features
                 tracks_data.append({
                     'name': track['name'],
                     'artist': track['artists'][0]['name'],
-                    'genres': artist_info['genres'],
+                    'genres': artists.get(artist_id, {}).get('genres', []),
                     'popularity': track['popularity'],
                     'features': {
                         'danceability': features['danceability'],
@@ -502,20 +862,18 @@ Format the analysis in clear sections with bullet points where appropriate."""
                 'analysis_prompt': self._format_tracks_for_prompt(tracks_data)
             }
             
-        except Exception as e:
+        except SPOTIFY_ERRORS as e:
             print(f"Error analyzing user taste: {e}")
             return None
 
     def _format_tracks_for_prompt(self, tracks_data):
         """Format tracks data for the AI prompt"""
-        formatted = []
-        for track in tracks_data:
-            formatted.append(
-                f"Track: {track['name']} by {track['artist']}\n"
-                f"Genres: {', '.join(track['genres'])}\n"
-                f"Popularity: {track['popularity']}\n"
-                f"Features: Energy={track['features']['energy']:.2f}, "
-                f"Danceability={track['features']['danceability']:.2f}, "
-                f"Valence={track['features']['valence']:.2f}\n"
-            )
-        return "\n".join(formatted) 
\ No newline at end of file
+        return "\n".join(
+            f"Track: {track['name']} by {track['artist']}\n"
+            f"Genres: {', '.join(track['genres'])}\n"
+            f"Popularity: {track['popularity']}\n"
+            f"Features: Energy={track['features']['energy']:.2f}, "
+            f"Danceability={track['features']['danceability']:.2f}, "
+            f"Valence={track['features']['valence']:.2f}\n"
+            for track in tracks_data
+        ) 
\ No newline at end of file
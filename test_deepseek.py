@@ -1,22 +1,41 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import httpx
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from spotify_helper import SpotifyAnalyzer
 
 # Load environment variables
 load_dotenv()
 
-# Initialize the clients
-client = OpenAI(
-    api_key=os.getenv("DEEPSEEK_API_KEY"),
-    base_url="https://api.deepseek.com/v1"
-)
-spotify = SpotifyAnalyzer()
+# Clients are built on first use so importing this module stays cheap
+@lru_cache(maxsize=1)
+def get_openai_client():
+    return OpenAI(
+        api_key=os.getenv("DEEPSEEK_API_KEY"),
+        base_url="https://api.deepseek.com/v1"
+    )
+
+# Async client shares one HTTP/2 connection pool, multiplexing concurrent requests
+@lru_cache(maxsize=1)
+def get_async_openai_client():
+    return AsyncOpenAI(
+        api_key=os.getenv("DEEPSEEK_API_KEY"),
+        base_url="https://api.deepseek.com/v1",
+        http_client=httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        )
+    )
+
+@lru_cache(maxsize=1)
+def get_spotify():
+    return SpotifyAnalyzer()
 
 def analyze_music(artist_name=None, song_url=None, genre=None):
     try:
         # Get Spotify track analysis
-        track_data = spotify.get_track_features(song_url) if song_url else None
+        track_data = get_spotify().get_track_features(song_url) if song_url else None
         
         system_prompt = """You are an AI-powered Music Strategist and A&R specialist focused on African music. 
         Analyze the provided information including Spotify metrics and audio features to give insights about:
@@ -35,7 +54,7 @@ def analyze_music(artist_name=None, song_url=None, genre=None):
         {track_data if track_data else 'No Spotify data available'}
         """
         
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="deepseek-chat",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -63,7 +82,7 @@ def scout_talent(region=None, genre=None):
         
         user_prompt = f"Scout for emerging talent in:\nRegion: {region}\nGenre: {genre}\nProvide a detailed report on the top 3 promising artists."
         
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model="deepseek-chat",
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -0,0 +1,219 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest import mock
+
+import requests
+
+import spotify_helper
+from spotify_helper import (
+    AUDIO_FEATURES_BATCH_SIZE, PAGE_LIMIT, RATE_LIMIT_RETRIES, SpotifyAnalyzer, _build_session
+)
+
+
+def make_analyzer():
+    """SpotifyAnalyzer with a mocked spotipy client and an empty lookup cache"""
+    spotify_helper._lookup_cache.clear()
+    analyzer = SpotifyAnalyzer.__new__(SpotifyAnalyzer)
+    analyzer.sp = mock.Mock()
+    return analyzer
+
+
+class RateLimitedHandler(BaseHTTPRequestHandler):
+    """Answers every request with a 429 carrying the configured Retry-After"""
+    retry_after = '0'
+    hits = 0
+
+    def do_GET(self):
+        type(self).hits += 1
+        self.send_response(429)
+        self.send_header('Retry-After', self.retry_after)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class RateLimitRetryTest(unittest.TestCase):
+    """429 handling of the production Spotify adapter against a local stub server"""
+
+    def setUp(self):
+        RateLimitedHandler.hits = 0
+        self.server = HTTPServer(('127.0.0.1', 0), RateLimitedHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = requests.Session()
+        self.session.mount('http://', _build_session().get_adapter('https://api.spotify.com/'))
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/artists/x"
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_429_retried_only_by_rate_limiter(self):
+        RateLimitedHandler.retry_after = '0'
+        response = self.session.get(self.url, timeout=5)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(RateLimitedHandler.hits, RATE_LIMIT_RETRIES + 1)
+
+    def test_long_retry_after_fails_fast(self):
+        RateLimitedHandler.retry_after = '3600'
+        start = time.monotonic()
+        response = self.session.get(self.url, timeout=5)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(RateLimitedHandler.hits, 1)
+        self.assertLess(time.monotonic() - start, 2)
+
+
+class CachingHandler(BaseHTTPRequestHandler):
+    """Serves a JSON body with the configured Cache-Control, answering 304 when If-None-Match matches"""
+    cache_control = 'max-age=60'
+    etag = '"v1"'
+    requests_seen = []
+
+    def do_GET(self):
+        if_none_match = self.headers.get('If-None-Match')
+        type(self).requests_seen.append((self.path, if_none_match))
+        if if_none_match == self.etag:
+            self.send_response(304)
+            self.send_header('ETag', self.etag)
+            self.send_header('Cache-Control', self.cache_control)
+            self.end_headers()
+            return
+        body = b'{"name": "artist"}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Cache-Control', self.cache_control)
+        self.send_header('ETag', self.etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ConditionalCacheTest(unittest.TestCase):
+    """Caching behaviour of the production Spotify adapter against a local stub server"""
+
+    def setUp(self):
+        CachingHandler.cache_control = 'max-age=60'
+        CachingHandler.requests_seen = []
+        self.server = HTTPServer(('127.0.0.1', 0), CachingHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.session = requests.Session()
+        self.session.mount('http://', _build_session().get_adapter('https://api.spotify.com/'))
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get_twice(self, path):
+        first = self.session.get(self.base + path, timeout=5)
+        second = self.session.get(self.base + path, timeout=5)
+        return first, second
+
+    def test_fresh_hit_skips_server(self):
+        first, second = self.get_twice('/v1/artists/x')
+        self.assertEqual(second.json(), {'name': 'artist'})
+        self.assertIsNot(first, second)
+        self.assertEqual(len(CachingHandler.requests_seen), 1)
+
+    def test_stale_entry_revalidated_and_replayed_on_304(self):
+        CachingHandler.cache_control = 'max-age=0'
+        _, second = self.get_twice('/v1/artists/x')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.json(), {'name': 'artist'})
+        self.assertEqual(CachingHandler.requests_seen, [('/v1/artists/x', None), ('/v1/artists/x', '"v1"')])
+
+    def test_no_store_not_cached(self):
+        CachingHandler.cache_control = 'no-store'
+        self.get_twice('/v1/artists/x')
+        self.assertEqual(CachingHandler.requests_seen, [('/v1/artists/x', None), ('/v1/artists/x', None)])
+
+    def test_skip_paths_bypass_cache(self):
+        self.get_twice('/v1/audio-analysis/x')
+        self.assertEqual(len(CachingHandler.requests_seen), 2)
+
+
+class PaginationTest(unittest.TestCase):
+    """Offset pagination and audio-features batching beyond Spotify's per-request limits"""
+
+    def test_paginate_fetches_every_page_up_to_limit(self):
+        analyzer = make_analyzer()
+        fetch = mock.Mock(side_effect=lambda limit, offset: {'items': list(range(offset, offset + limit))})
+        items = analyzer._paginate(fetch, 120)
+        self.assertEqual(items, list(range(120)))
+        self.assertTrue(all(call.kwargs['limit'] <= PAGE_LIMIT for call in fetch.call_args_list))
+
+    def test_paginate_reads_total_from_first_page(self):
+        analyzer = make_analyzer()
+        fetch = mock.Mock(side_effect=lambda limit, offset: {
+            'items': list(range(offset, min(offset + limit, 130))), 'total': 130
+        })
+        self.assertEqual(analyzer._paginate(fetch), list(range(130)))
+        self.assertEqual(fetch.call_count, 3)
+
+    def test_audio_features_batched_and_ordered(self):
+        analyzer = make_analyzer()
+        analyzer.sp.audio_features.side_effect = lambda ids: [{'id': tid} for tid in ids]
+        track_ids = [f"t{i}" for i in range(AUDIO_FEATURES_BATCH_SIZE * 2 + 1)]
+        features = analyzer._audio_features(track_ids)
+        self.assertEqual([feature['id'] for feature in features], track_ids)
+        batches = [call.args[0] for call in analyzer.sp.audio_features.call_args_list]
+        self.assertEqual([len(batch) for batch in batches], [100, 100, 1])
+
+    def test_audio_features_skips_cached_tracks(self):
+        analyzer = make_analyzer()
+        analyzer.sp.audio_features.side_effect = lambda ids: [{'id': tid} for tid in ids]
+        analyzer._audio_features(['a', 'b'])
+        analyzer._audio_features(['a', 'b', 'c'])
+        self.assertEqual(analyzer.sp.audio_features.call_args.args[0], ['c'])
+
+
+class ExtractIdTest(unittest.TestCase):
+    """Spotify ID extraction from URLs, URIs and bare IDs"""
+    ARTIST_ID = '4Z8W4fKeB5YxbusRsdQVPb'
+    TRACK_ID = '3n3Ppam7vgaVa1iaRUc9Lp'
+
+    def setUp(self):
+        self.analyzer = make_analyzer()
+
+    def test_url(self):
+        url = f"https://open.spotify.com/artist/{self.ARTIST_ID}?si=abc"
+        self.assertEqual(self.analyzer.extract_artist_id(url), self.ARTIST_ID)
+        url = f"https://open.spotify.com/track/{self.TRACK_ID}"
+        self.assertEqual(self.analyzer.extract_track_id(url), self.TRACK_ID)
+
+    def test_uri(self):
+        self.assertEqual(self.analyzer.extract_artist_id(f"spotify:artist:{self.ARTIST_ID}"), self.ARTIST_ID)
+        self.assertEqual(self.analyzer.extract_track_id(f"spotify:track:{self.TRACK_ID}"), self.TRACK_ID)
+
+    def test_locale_prefixed_url(self):
+        url = f"https://open.spotify.com/intl-fr/artist/{self.ARTIST_ID}"
+        self.assertEqual(self.analyzer.extract_artist_id(url), self.ARTIST_ID)
+
+    def test_bare_id(self):
+        self.assertEqual(self.analyzer.extract_artist_id(f" {self.ARTIST_ID} "), self.ARTIST_ID)
+        self.assertEqual(self.analyzer.extract_track_id(self.TRACK_ID), self.TRACK_ID)
+
+    def test_over_long_id_rejected(self):
+        url = f"https://open.spotify.com/artist/{self.ARTIST_ID}12345678"
+        self.assertIsNone(self.analyzer.extract_artist_id(url))
+        self.assertIsNone(self.analyzer.extract_artist_id(self.ARTIST_ID + 'x'))
+        self.assertIsNone(self.analyzer.extract_track_id(f"spotify:track:{self.TRACK_ID}abc"))
+
+    def test_wrong_type_url_rejected(self):
+        self.assertIsNone(self.analyzer.extract_artist_id(f"https://open.spotify.com/track/{self.TRACK_ID}"))
+        self.assertIsNone(self.analyzer.extract_track_id(f"spotify:artist:{self.ARTIST_ID}"))
+
+    def test_name_rejected(self):
+        self.assertIsNone(self.analyzer.extract_artist_id("Drake"))
+
+
+if __name__ == '__main__':
+    unittest.main()